@@ -10,8 +10,11 @@ import datetime
 import time
 import json
 import os
+import queue
 import requests
-from threading import Thread
+from requests.adapters import HTTPAdapter
+from threading import Thread, Lock, local
+from concurrent.futures import ThreadPoolExecutor
 import logging
 from picamera2 import Picamera2
 import smtplib
@@ -19,6 +22,19 @@ from email.mime.multipart import MIMEMultipart
 from email.mime.text import MIMEText
 from email.mime.image import MIMEImage
 
+try:
+    from pycoral.adapters import common, detect
+    from pycoral.utils.edgetpu import make_interpreter
+except ImportError:
+    make_interpreter = None
+
+try:
+    from numba import njit
+except ImportError:
+    # Without numba the helpers below run as plain Python
+    def njit(*args, **kwargs):
+        return lambda func: func
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -29,15 +45,142 @@ logging.basicConfig(
     ]
 )
 
+# Where annotated detection images are saved
+DETECTIONS_DIR = '/home/pi/detections'
+
+# JPEG quality for saved and emailed detection images
+JPEG_QUALITY = 80
+
+# Main loop intervals (seconds): shortly after motion, idle, outside hours
+ACTIVE_INTERVAL = 0.1
+IDLE_INTERVAL = 1.0
+OFF_HOURS_INTERVAL = 30.0
+
+# How long the loop stays at ACTIVE_INTERVAL after motion was last seen
+MOTION_HOLD_SECONDS = 10
+
+# Minimum seconds between saved detection images while a person stays in view
+SAVE_INTERVAL = 1.0
+
+# Seconds before an alert's network connection or request gives up
+ALERT_TIMEOUT = 15
+
+# Capture resolution; frames arrive as planar YUV420 (I420)
+FRAME_SIZE = (640, 480)
+
+# Frame size the motion gate runs at
+MOTION_FRAME_SIZE = (160, 120)
+
+def luma_plane(frame):
+    """Return the Y (grayscale) plane of a YUV420 frame without copying"""
+    return frame[:frame.shape[0] * 2 // 3]
+
+def yuv_to_bgr(frame):
+    """Convert a YUV420 frame to BGR for drawing, saving or the DNN"""
+    return cv2.cvtColor(frame, cv2.COLOR_YUV2BGR_I420)
+
+@njit('i4[:](f4[:,:], f4[:], f4)', cache=True)
+def nms(boxes, scores, iou_threshold):
+    """Non-max suppression over (x, y, w, h) boxes; returns kept indices"""
+    order = np.argsort(-scores)
+    n = order.shape[0]
+    suppressed = np.zeros(n, dtype=np.bool_)
+    keep = np.empty(n, dtype=np.int32)
+    count = 0
+    
+    for i in range(n):
+        if suppressed[i]:
+            continue
+        a = order[i]
+        keep[count] = a
+        count += 1
+        
+        ax1, ay1 = boxes[a, 0], boxes[a, 1]
+        ax2, ay2 = ax1 + boxes[a, 2], ay1 + boxes[a, 3]
+        area_a = boxes[a, 2] * boxes[a, 3]
+        
+        for j in range(i + 1, n):
+            if suppressed[j]:
+                continue
+            b = order[j]
+            bx1, by1 = boxes[b, 0], boxes[b, 1]
+            bx2, by2 = bx1 + boxes[b, 2], by1 + boxes[b, 3]
+            
+            inter_w = min(ax2, bx2) - max(ax1, bx1)
+            inter_h = min(ay2, by2) - max(ay1, by1)
+            if inter_w <= 0 or inter_h <= 0:
+                continue
+            
+            inter = inter_w * inter_h
+            union = area_a + boxes[b, 2] * boxes[b, 3] - inter
+            if inter / union > iou_threshold:
+                suppressed[j] = True
+    
+    return keep[:count]
+
 class SecurityCamera:
+    # HOG people-detector SVM coefficients, shared by every descriptor
+    PEOPLE_DETECTOR = cv2.HOGDescriptor_getDefaultPeopleDetector()
+    
     def __init__(self, config_file='config.json'):
         self.config = self.load_config(config_file)
         self.camera = None
-        self.hog = cv2.HOGDescriptor()
-        self.hog.setSVMDetector(cv2.HOGDescriptor_getDefaultPeopleDetector())
+        
+        # Use OpenCV's SIMD (NEON) dispatch and all CPU cores
+        cv2.setUseOptimized(True)
+        cv2.setNumThreads(os.cpu_count() or 1)
+        
+        self.tpu = self.load_edgetpu_interpreter()
+        self.net = self.load_detector_net() if self.tpu is None else None
+        self.hog_local = local()  # HOGDescriptor is not thread-safe
+        self.bg = cv2.createBackgroundSubtractorMOG2(
+            history=200, varThreshold=32, detectShadows=False
+        )
         self.last_alert_time = 0
         self.alert_cooldown = self.config.get('alert_cooldown', 300)  # 5 minutes
         
+        # Resolve hot-path settings once instead of per frame/detection
+        self.detection_threshold = float(self.config['detection_threshold'])
+        self.min_detection_area = int(self.config['min_detection_area'])
+        self.hog_frame_size = tuple(int(v) for v in self.config['hog_frame_size'])
+        self.nms_threshold = float(self.config['nms_threshold'])
+        self.motion_min_pixels = int(self.config['motion_min_pixels'])
+        self.dnn_person_class = int(self.config['dnn_person_class'])
+        self.edgetpu_person_class = int(self.config['edgetpu_person_class'])
+        self.monitoring_start = datetime.datetime.strptime(
+            self.config['monitoring_start'], "%H:%M"
+        ).time()
+        self.monitoring_end = datetime.datetime.strptime(
+            self.config['monitoring_end'], "%H:%M"
+        ).time()
+        
+        self.detections_dir = DETECTIONS_DIR
+        os.makedirs(self.detections_dir, exist_ok=True)
+        
+        # Detection images are written by a background thread so SD-card
+        # stalls never block the monitoring loop
+        self.write_queue = queue.Queue(maxsize=32)
+        self.writer_thread = Thread(target=self.write_loop, daemon=True)
+        self.writer_thread.start()
+        
+        # Latest captured frame, handed from the capture thread to run()
+        self.running = False
+        self.latest_frame = None
+        self.frame_lock = Lock()
+        self.capture_thread = None
+        self.last_motion_time = float('-inf')
+        self.last_save_time = float('-inf')
+        
+        # Persistent connections so repeat alerts skip the TCP/TLS handshake
+        self.http = requests.Session()
+        self.http.mount('https://', HTTPAdapter(pool_connections=2, pool_maxsize=4))
+        self.smtp = None
+        self.smtp_lock = Lock()
+        
+        # One worker per notification channel; run() never waits on alerts
+        self.alert_pool = ThreadPoolExecutor(max_workers=3)
+        self.pending_alerts = {}  # Channel name -> future of its last alert
+        
         # Initialize camera
         self.init_camera()
         
@@ -49,6 +192,14 @@ class SecurityCamera:
             "alert_cooldown": 300,        # 5 minutes between alerts
             "detection_threshold": 0.5,
             "min_detection_area": 3000,
+            "hog_frame_size": [640, 480], # [320, 240] is ~4x faster, detects people >=256px tall
+            "nms_threshold": 0.45,        # IoU above which overlapping boxes merge
+            "motion_min_pixels": 300,     # Changed pixels (160x120) to run detection
+            "dnn_model": "mobilenet_ssd_int8.onnx",  # Falls back to HOG if missing
+            "dnn_person_class": 15,       # 15 for VOC MobileNet-SSD, 1 for COCO
+            "dnn_fp16": False,            # Use FP16 target (Pi 5)
+            "edgetpu_model": "ssd_mobilenet_v2_coco_quant_postprocess_edgetpu.tflite",
+            "edgetpu_person_class": 0,    # "person" label id in the Coral COCO models
             "email": {
                 "enabled": True,
                 "smtp_server": "smtp.gmail.com",
@@ -87,12 +238,47 @@ class SecurityCamera:
             logging.info(f"Created default config file: {config_file}")
             return default_config
     
+    def load_edgetpu_interpreter(self):
+        """Load the Coral Edge TPU detector, or return None to use the CPU"""
+        model_path = self.config.get('edgetpu_model')
+        if make_interpreter is None or not model_path or not os.path.exists(model_path):
+            return None
+        
+        try:
+            interpreter = make_interpreter(model_path)
+            interpreter.allocate_tensors()
+            logging.info(f"Loaded Edge TPU detector: {model_path}")
+            return interpreter
+        except Exception as e:
+            logging.error(f"Failed to initialize Edge TPU, using CPU detector: {e}")
+            return None
+    
+    def load_detector_net(self):
+        """Load the ONNX person detector, or return None to use HOG"""
+        model_path = self.config.get('dnn_model')
+        if not model_path or not os.path.exists(model_path):
+            logging.info("DNN model not found, using HOG detector")
+            return None
+        
+        try:
+            net = cv2.dnn.readNetFromONNX(model_path)
+            net.setPreferableBackend(cv2.dnn.DNN_BACKEND_OPENCV)
+            if self.config.get('dnn_fp16', False):
+                net.setPreferableTarget(cv2.dnn.DNN_TARGET_CPU_FP16)
+            else:
+                net.setPreferableTarget(cv2.dnn.DNN_TARGET_CPU)
+            logging.info(f"Loaded DNN detector: {model_path}")
+            return net
+        except Exception as e:
+            logging.error(f"Failed to load DNN model, using HOG detector: {e}")
+            return None
+    
     def init_camera(self):
         """Initialize the camera"""
         try:
             self.camera = Picamera2()
             config = self.camera.create_preview_configuration(
-                main={"size": (640, 480)}
+                main={"size": FRAME_SIZE, "format": "YUV420"}
             )
             self.camera.configure(config)
             self.camera.start()
@@ -105,12 +291,8 @@ class SecurityCamera:
     def is_monitoring_time(self):
         """Check if current time is within monitoring hours"""
         now = datetime.datetime.now().time()
-        start_time = datetime.datetime.strptime(
-            self.config['monitoring_start'], "%H:%M"
-        ).time()
-        end_time = datetime.datetime.strptime(
-            self.config['monitoring_end'], "%H:%M"
-        ).time()
+        start_time = self.monitoring_start
+        end_time = self.monitoring_end
         
         # Handle overnight monitoring (e.g., 18:00 to 08:00)
         if start_time > end_time:
@@ -118,52 +300,180 @@ class SecurityCamera:
         else:
             return start_time <= now <= end_time
     
+    def get_hog(self):
+        """Return this thread's HOG descriptor, creating it on first use"""
+        hog = getattr(self.hog_local, 'hog', None)
+        if hog is None:
+            hog = cv2.HOGDescriptor()
+            hog.setSVMDetector(self.PEOPLE_DETECTOR)
+            self.hog_local.hog = hog
+        return hog
+    
+    def has_motion(self, frame):
+        """Cheap background-subtraction check before running the detector"""
+        small = cv2.resize(luma_plane(frame), MOTION_FRAME_SIZE,
+                           interpolation=cv2.INTER_AREA)
+        fg_mask = self.bg.apply(small)
+        return cv2.countNonZero(fg_mask) >= self.motion_min_pixels
+    
     def detect_humans(self, frame):
-        """Detect humans in the frame using HOG descriptor"""
-        # Convert to grayscale for processing
-        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        """Detect humans using the Edge TPU, the DNN, or HOG as fallback
+        
+        Returns an (N, 4) array of (x, y, w, h) boxes in frame pixels.
+        """
+        if self.tpu is not None:
+            return self.detect_humans_edgetpu(frame)
+        if self.net is not None:
+            return self.detect_humans_dnn(frame)
+        
+        # The Y plane is already grayscale, so no color conversion is needed
+        luma = luma_plane(frame)
+        frame_h, frame_w = luma.shape[:2]
+        
+        # Optionally downscale before HOG; the 64x128 window then only finds
+        # people proportionally taller in the captured frame
+        if self.hog_frame_size == (frame_w, frame_h):
+            gray = luma
+        else:
+            gray = cv2.resize(luma, self.hog_frame_size, interpolation=cv2.INTER_AREA)
+        scale_x = frame_w / self.hog_frame_size[0]
+        scale_y = frame_h / self.hog_frame_size[1]
         
         # Detect people
-        boxes, weights = self.hog.detectMultiScale(
+        boxes, weights = self.get_hog().detectMultiScale(
             gray,
             winStride=(8, 8),
             padding=(32, 32),
             scale=1.05
         )
         
+        if len(boxes) == 0:
+            return np.empty((0, 4), dtype=np.int32)
+        
+        # Scale boxes back to full-frame pixels
+        # Keep arrays in int32/float32 rather than NumPy's default 64-bit types
+        scale = np.array((scale_x, scale_y, scale_x, scale_y), dtype=np.float32)
+        boxes = (np.asarray(boxes, dtype=np.float32) * scale).astype(np.int32)
+        weights = np.asarray(weights, dtype=np.float32).ravel()
+        
         # Filter detections based on confidence and size
-        valid_detections = []
-        for i, (x, y, w, h) in enumerate(boxes):
-            if (weights[i] > self.config['detection_threshold'] and 
-                w * h > self.config['min_detection_area']):
-                valid_detections.append((x, y, w, h))
+        areas = boxes[:, 2] * boxes[:, 3]
+        mask = ((weights > self.detection_threshold) &
+                (areas > self.min_detection_area))
+        boxes, weights = boxes[mask], weights[mask]
         
-        return valid_detections
+        # Merge overlapping windows HOG reports for the same person
+        keep = nms(boxes.astype(np.float32), weights,
+                   np.float32(self.nms_threshold))
+        return boxes[keep]
+    
+    def detect_humans_dnn(self, frame):
+        """Detect humans in the frame using the MobileNet-SSD network"""
+        frame_h, frame_w = luma_plane(frame).shape[:2]
+        
+        blob = cv2.dnn.blobFromImage(
+            yuv_to_bgr(frame),
+            1 / 127.5,
+            (300, 300),
+            (127.5, 127.5, 127.5),
+            swapRB=True
+        )
+        self.net.setInput(blob)
+        
+        # SSD output rows: [image_id, class_id, score, x1, y1, x2, y2]
+        dets = self.net.forward().reshape(-1, 7)
+        
+        dets = dets[(dets[:, 1].astype(np.int32) == self.dnn_person_class) &
+                    (dets[:, 2] > self.detection_threshold)]
+        
+        # Normalized corners to (x, y, w, h) in frame pixels
+        scale = np.array((frame_w, frame_h, frame_w, frame_h), dtype=np.float32)
+        corners = (np.clip(dets[:, 3:7], 0.0, 1.0) * scale).astype(np.int32)
+        boxes = np.column_stack((corners[:, :2], corners[:, 2:] - corners[:, :2]))
+        
+        areas = boxes[:, 2] * boxes[:, 3]
+        return boxes[areas > self.min_detection_area]
+    
+    def detect_humans_edgetpu(self, frame):
+        """Detect humans in the frame using the Coral Edge TPU"""
+        frame_h, frame_w = luma_plane(frame).shape[:2]
+        in_w, in_h = common.input_size(self.tpu)
+        
+        rgb = cv2.cvtColor(frame, cv2.COLOR_YUV2RGB_I420)
+        common.set_input(self.tpu, cv2.resize(rgb, (in_w, in_h),
+                                              interpolation=cv2.INTER_AREA))
+        self.tpu.invoke()
+        objs = detect.get_objects(self.tpu, self.detection_threshold)
+        
+        # Boxes come back in model-input pixels as (xmin, ymin, xmax, ymax)
+        corners = np.array(
+            [(o.bbox.xmin, o.bbox.ymin, o.bbox.xmax, o.bbox.ymax)
+             for o in objs if o.id == self.edgetpu_person_class],
+            dtype=np.float32
+        ).reshape(-1, 4)
+        scale = np.array((frame_w / in_w, frame_h / in_h, frame_w / in_w, frame_h / in_h),
+                         dtype=np.float32)
+        corners = (corners * scale).astype(np.int32)
+        boxes = np.column_stack((corners[:, :2], corners[:, 2:] - corners[:, :2]))
+        
+        areas = boxes[:, 2] * boxes[:, 3]
+        return boxes[areas > self.min_detection_area]
     
     def draw_detections(self, frame, detections):
         """Draw bounding boxes around detected humans"""
-        for (x, y, w, h) in detections:
+        for (x, y, w, h) in detections.tolist():
             cv2.rectangle(frame, (x, y), (x + w, y + h), (0, 255, 0), 2)
             cv2.putText(frame, 'Human', (x, y - 10), 
                        cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 0), 2)
         return frame
     
     def save_detection_image(self, frame, detections):
-        """Save image with detections"""
-        timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
-        filename = f"/home/pi/detections/detection_{timestamp}.jpg"
+        """Save image with detections and return the encoded JPEG bytes"""
+        timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S_%f")
+        filename = os.path.join(self.detections_dir, f"detection_{timestamp}.jpg")
         
-        # Create directory if it doesn't exist
-        os.makedirs(os.path.dirname(filename), exist_ok=True)
+        # Color is only reconstructed from YUV when an image is saved
+        annotated_frame = self.draw_detections(yuv_to_bgr(frame), detections)
         
-        # Draw detections on frame
-        annotated_frame = self.draw_detections(frame.copy(), detections)
+        # Encode once; the same bytes are written to disk and attached to email
+        ok, buf = cv2.imencode('.jpg', annotated_frame,
+                               [cv2.IMWRITE_JPEG_QUALITY, JPEG_QUALITY])
+        if not ok:
+            logging.error("Failed to encode detection image")
+            return None
+        image_data = buf.tobytes()
         
-        cv2.imwrite(filename, annotated_frame)
-        logging.info(f"Detection image saved: {filename}")
-        return filename
+        self.queue_image_write(filename, image_data)
+        return image_data
     
-    def send_email_alert(self, image_path, detection_count):
+    def queue_image_write(self, filename, image_data):
+        """Hand an encoded image to the writer thread, dropping the oldest if full"""
+        try:
+            self.write_queue.put_nowait((filename, image_data))
+        except queue.Full:
+            try:
+                dropped, _ = self.write_queue.get_nowait()
+                logging.warning(f"Image write queue full, dropped: {dropped}")
+            except queue.Empty:
+                pass
+            self.write_queue.put_nowait((filename, image_data))
+    
+    def write_loop(self):
+        """Write queued detection images to disk until a None sentinel"""
+        while True:
+            item = self.write_queue.get()
+            if item is None:
+                break
+            
+            filename, image_data = item
+            try:
+                with open(filename, 'wb') as f:
+                    f.write(image_data)
+                logging.info(f"Detection image saved: {filename}")
+            except OSError as e:
+                logging.error(f"Failed to save detection image {filename}: {e}")
+    
+    def send_email_alert(self, image_data, detection_count):
         """Send email alert with detection image"""
         if not self.config['email']['enabled']:
             return
@@ -188,28 +498,54 @@ class SecurityCamera:
             msg.attach(MIMEText(body, 'plain'))
             
             # Attach image
-            if os.path.exists(image_path):
-                with open(image_path, 'rb') as f:
-                    img_data = f.read()
-                    image = MIMEImage(img_data)
-                    image.add_header('Content-Disposition', 
-                                   f'attachment; filename="detection.jpg"')
-                    msg.attach(image)
+            if image_data:
+                image = MIMEImage(image_data, _subtype='jpeg')
+                image.add_header('Content-Disposition', 
+                               f'attachment; filename="detection.jpg"')
+                msg.attach(image)
             
-            # Send email
-            server = smtplib.SMTP(self.config['email']['smtp_server'], 
-                                self.config['email']['smtp_port'])
-            server.starttls()
-            server.login(self.config['email']['sender_email'], 
-                        self.config['email']['sender_password'])
-            server.send_message(msg)
-            server.quit()
+            # Send email, reconnecting once if the cached session failed. Idle
+            # connections are often closed with a 421 reply, which smtplib
+            # raises as SMTPSenderRefused rather than SMTPServerDisconnected.
+            with self.smtp_lock:
+                try:
+                    self.get_smtp().send_message(msg)
+                except (smtplib.SMTPException, OSError) as e:
+                    logging.info(f"SMTP connection failed ({e}), reconnecting")
+                    self.close_smtp()
+                    self.get_smtp().send_message(msg)
             
             logging.info("Email alert sent successfully")
             
         except Exception as e:
             logging.error(f"Failed to send email alert: {e}")
     
+    def get_smtp(self):
+        """Return the cached SMTP connection, connecting and logging in if needed"""
+        if self.smtp is None:
+            server = smtplib.SMTP(self.config['email']['smtp_server'], 
+                                self.config['email']['smtp_port'],
+                                timeout=ALERT_TIMEOUT)
+            try:
+                server.starttls()
+                server.login(self.config['email']['sender_email'], 
+                            self.config['email']['sender_password'])
+            except Exception:
+                server.close()
+                raise
+            self.smtp = server
+        return self.smtp
+    
+    def close_smtp(self):
+        """Close and forget the cached SMTP connection, ignoring errors"""
+        if self.smtp is None:
+            return
+        try:
+            self.smtp.quit()
+        except (smtplib.SMTPException, OSError):
+            self.smtp.close()
+        self.smtp = None
+    
     def send_pushbullet_alert(self, detection_count):
         """Send Pushbullet notification"""
         if not self.config['pushbullet']['enabled']:
@@ -227,7 +563,8 @@ class SecurityCamera:
                 "body": f"Human detection alert! {detection_count} person(s) detected at {datetime.datetime.now().strftime('%H:%M:%S')}"
             }
             
-            response = requests.post(url, headers=headers, json=data)
+            response = self.http.post(url, headers=headers, json=data,
+                                      timeout=ALERT_TIMEOUT)
             if response.status_code == 200:
                 logging.info("Pushbullet notification sent successfully")
             else:
@@ -253,7 +590,7 @@ class SecurityCamera:
                 "text": message
             }
             
-            response = requests.post(url, data=data)
+            response = self.http.post(url, data=data, timeout=ALERT_TIMEOUT)
             if response.status_code == 200:
                 logging.info("Telegram notification sent successfully")
             else:
@@ -262,7 +599,15 @@ class SecurityCamera:
         except Exception as e:
             logging.error(f"Failed to send Telegram notification: {e}")
     
-    def send_alerts(self, image_path, detection_count):
+    def dispatch_alert(self, channel, func, *args):
+        """Submit an alert unless the channel's previous one is still running"""
+        previous = self.pending_alerts.get(channel)
+        if previous is not None and not previous.done():
+            logging.warning(f"Previous {channel} alert still in progress, skipping")
+            return
+        self.pending_alerts[channel] = self.alert_pool.submit(func, *args)
+    
+    def send_alerts(self, image_data, detection_count):
         """Send all configured alerts"""
         current_time = time.time()
         
@@ -271,59 +616,109 @@ class SecurityCamera:
             logging.info("Alert cooldown active, skipping notification")
             return
         
-        # Send alerts in separate threads to avoid blocking
-        alert_threads = []
-        
+        # Submit alerts to the worker pool without waiting for them
         if self.config['email']['enabled']:
-            t = Thread(target=self.send_email_alert, args=(image_path, detection_count))
-            alert_threads.append(t)
+            self.dispatch_alert('email', self.send_email_alert, image_data, detection_count)
         
         if self.config['pushbullet']['enabled']:
-            t = Thread(target=self.send_pushbullet_alert, args=(detection_count,))
-            alert_threads.append(t)
+            self.dispatch_alert('pushbullet', self.send_pushbullet_alert, detection_count)
         
         if self.config['telegram']['enabled']:
-            t = Thread(target=self.send_telegram_alert, args=(detection_count,))
-            alert_threads.append(t)
+            self.dispatch_alert('telegram', self.send_telegram_alert, detection_count)
+        
+        self.last_alert_time = current_time
+        logging.info(f"All alerts dispatched for {detection_count} detection(s)")
+    
+    def capture_loop(self):
+        """Continuously capture frames so camera I/O overlaps detection"""
+        while self.running:
+            if not self.is_monitoring_time():
+                time.sleep(1)
+                continue
+            
+            try:
+                frame = self.camera.capture_array()
+            except Exception as e:
+                logging.error(f"Frame capture failed: {e}")
+                time.sleep(1)
+                continue
+            
+            # Overwrite any unprocessed frame; detection always sees the freshest
+            with self.frame_lock:
+                self.latest_frame = frame
+    
+    def get_latest_frame(self):
+        """Take the most recent frame, or None if nothing new was captured"""
+        with self.frame_lock:
+            frame = self.latest_frame
+            self.latest_frame = None
+        return frame
+    
+    def next_interval(self, in_window):
+        """Pick the loop interval from the schedule and recent motion"""
+        if not in_window:
+            return OFF_HOURS_INTERVAL
+        if time.monotonic() - self.last_motion_time < MOTION_HOLD_SECONDS:
+            return ACTIVE_INTERVAL
+        return IDLE_INTERVAL
+    
+    def process_frame(self):
+        """Run motion gating, detection and alerts on the latest frame"""
+        # Grab the latest frame from the capture thread
+        frame = self.get_latest_frame()
+        if frame is None:
+            return
         
-        # Start all alert threads
-        for thread in alert_threads:
-            thread.start()
+        # OpenCV's SIMD paths need C-contiguous input; no-op in the usual case
+        frame = np.ascontiguousarray(frame)
         
-        # Wait for all threads to complete
-        for thread in alert_threads:
-            thread.join()
+        # Skip the detector on static scenes
+        if not self.has_motion(frame):
+            return
+        self.last_motion_time = time.monotonic()
         
-        self.last_alert_time = current_time
-        logging.info(f"All alerts sent for {detection_count} detection(s)")
+        # Detect humans
+        detections = self.detect_humans(frame)
+        
+        if len(detections):
+            logging.info(f"Human detection: {len(detections)} person(s) detected")
+            
+            # At ACTIVE_INTERVAL the loop detects several times a second;
+            # save (and alert) at most once per SAVE_INTERVAL
+            now = time.monotonic()
+            if now - self.last_save_time < SAVE_INTERVAL:
+                return
+            self.last_save_time = now
+            
+            # Save detection image
+            image_data = self.save_detection_image(frame, detections)
+            
+            # Send alerts
+            self.send_alerts(image_data, len(detections))
     
     def run(self):
         """Main monitoring loop"""
         logging.info("Starting security camera monitoring...")
         
+        self.running = True
+        self.capture_thread = Thread(target=self.capture_loop, daemon=True)
+        self.capture_thread.start()
+        
+        next_deadline = time.monotonic()
+        
         try:
             while True:
-                if not self.is_monitoring_time():
-                    time.sleep(60)  # Check every minute
-                    continue
-                
-                # Capture frame
-                frame = self.camera.capture_array()
+                in_window = self.is_monitoring_time()
+                if in_window:
+                    self.process_frame()
                 
-                # Detect humans
-                detections = self.detect_humans(frame)
-                
-                if detections:
-                    logging.info(f"Human detection: {len(detections)} person(s) detected")
-                    
-                    # Save detection image
-                    image_path = self.save_detection_image(frame, detections)
-                    
-                    # Send alerts
-                    self.send_alerts(image_path, len(detections))
-                
-                # Small delay to prevent excessive CPU usage
-                time.sleep(1)
+                # Sleep to a monotonic deadline so the cadence does not drift;
+                # if processing overran, start the next interval from now
+                next_deadline += self.next_interval(in_window)
+                now = time.monotonic()
+                if next_deadline < now:
+                    next_deadline = now
+                time.sleep(next_deadline - now)
                 
         except KeyboardInterrupt:
             logging.info("Monitoring stopped by user")
@@ -332,8 +727,18 @@ class SecurityCamera:
             logging.error(f"Error in main loop: {e}")
         
         finally:
+            self.running = False
+            if self.capture_thread:
+                self.capture_thread.join(timeout=2)
             if self.camera:
                 self.camera.stop()
+            # Let in-flight alerts finish before closing their connections
+            self.alert_pool.shutdown(wait=True)
+            self.close_smtp()
+            self.http.close()
+            # Flush pending detection images before exiting
+            self.write_queue.put(None)
+            self.writer_thread.join(timeout=5)
             logging.info("Camera stopped")
 
 def main():